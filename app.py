@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+import click
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 from bson.decimal128 import Decimal128
@@ -12,6 +13,8 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+# Store finished roasts' temp_curve as compact delta-encoded binary columns
+app.config['COMPACT_TEMP_CURVE'] = os.environ.get('COMPACT_TEMP_CURVE', 'false').lower() == 'true'
 
 # MongoDB Connection
 MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
@@ -21,6 +24,7 @@ db = client.roastlogger
 # Collections
 beans_collection = db.beans
 roasts_collection = db.roasts
+roast_models_collection = db.roast_models
 
 
 # ============================================
@@ -30,6 +34,7 @@ roasts_collection = db.roasts
 @app.route('/')
 def index():
     """Dashboard - list of all roasts"""
+    from models.prediction_helpers import get_first_crack_timing
     roasts = list(roasts_collection.find({'archived': {'$ne': True}}).sort('roast_date', -1))
 
     # Get bean names and calculate metrics for each roast
@@ -53,13 +58,9 @@ def index():
 
         # Calculate time after first crack (use latest FC if multiple)
         if roast.get('key_timings') and roast.get('total_duration_seconds'):
-            fc_start = None
-            # Find the latest First Crack Start
-            for timing in roast['key_timings']:
-                if 'First Crack Start' in timing['event_name']:
-                    fc_start = timing['time_seconds']  # Will keep updating to latest one
-            if fc_start:
-                roast['time_after_fc'] = roast['total_duration_seconds'] - fc_start
+            fc_timing = get_first_crack_timing(roast['key_timings'])
+            if fc_timing and fc_timing['time_seconds']:
+                roast['time_after_fc'] = roast['total_duration_seconds'] - fc_timing['time_seconds']
 
     return render_template('index.html', roasts=roasts)
 
@@ -97,9 +98,11 @@ def roast_new():
 @app.route('/roast/live/<roast_id>')
 def roast_live(roast_id):
     """Live roasting interface"""
+    from models.curve_helpers import get_temp_curve
     roast = roasts_collection.find_one({'_id': ObjectId(roast_id), 'archived': {'$ne': True}})
     if not roast:
         return "Roast not found", 404
+    roast['temp_curve'] = get_temp_curve(roast)
 
     beans = list(beans_collection.find({'archived': {'$ne': True}}).sort('name', 1))
     return render_template('roast_live.html', roast=roast, beans=beans)
@@ -108,9 +111,11 @@ def roast_live(roast_id):
 @app.route('/roast/detail/<roast_id>')
 def roast_detail(roast_id):
     """View roast details"""
+    from models.curve_helpers import get_temp_curve
     roast = roasts_collection.find_one({'_id': ObjectId(roast_id), 'archived': {'$ne': True}})
     if not roast:
         return "Roast not found", 404
+    roast['temp_curve'] = get_temp_curve(roast)
 
     # Get bean info
     if roast.get('bean_id'):
@@ -130,9 +135,11 @@ def roast_detail(roast_id):
 @app.route('/roast/edit/<roast_id>')
 def roast_edit_form(roast_id):
     """Edit roast form"""
+    from models.curve_helpers import get_temp_curve
     roast = roasts_collection.find_one({'_id': ObjectId(roast_id), 'archived': {'$ne': True}})
     if not roast:
         return "Roast not found", 404
+    roast['temp_curve'] = get_temp_curve(roast)
 
     beans = list(beans_collection.find({'archived': {'$ne': True}}).sort('name', 1))
     return render_template('roast_edit.html', roast=roast, beans=beans)
@@ -226,6 +233,12 @@ def api_roast_end(roast_id):
             'updated_at': datetime.now()
         }}
     )
+
+    # The curve is complete now, so it can be packed into the compact layout
+    if app.config['COMPACT_TEMP_CURVE']:
+        from models.curve_helpers import compact_temp_curve
+        compact_temp_curve(roasts_collection, ObjectId(roast_id))
+
     return jsonify({'success': True})
 
 
@@ -288,15 +301,54 @@ def api_roast_add_event(roast_id):
     if data.get('note'):
         temp_event['note'] = data['note']
 
-    roasts_collection.update_one(
+    roast = roasts_collection.find_one_and_update(
         {'_id': ObjectId(roast_id)},
         {
             '$push': {'temp_curve': temp_event},
             '$set': {'updated_at': datetime.now()}
-        }
+        },
+        projection={'bean_id': 1, 'roaster': 1, 'key_timings': 1}
     )
 
-    return jsonify({'success': True})
+    # Predict first crack / drop from the fitted model for this bean and roaster
+    prediction = None
+    if roast and roast.get('bean_id'):
+        model = roast_models_collection.find_one({
+            'bean_id': roast['bean_id'],
+            'roaster': roast.get('roaster', '')
+        })
+        if model:
+            from models.prediction_helpers import predict_timings, get_first_crack_timing
+            fc_timing = get_first_crack_timing(roast.get('key_timings'))
+            prediction = predict_timings(
+                model,
+                temp_event['time_seconds'],
+                temp_event['temperature'],
+                fc_timing['time_seconds'] if fc_timing else None
+            )
+
+    return jsonify({'success': True, 'prediction': prediction})
+
+
+@app.route('/api/roast/curve/<roast_id>')
+def api_roast_curve(roast_id):
+    """Temperature curve in columnar JSON, or delta-encoded binary with ?format=binary"""
+    from models.curve_helpers import get_temp_curve_columns, encode_temp_curve_payload
+    roast = roasts_collection.find_one(
+        {'_id': ObjectId(roast_id), 'archived': {'$ne': True}},
+        {'temp_curve': 1, 'temp_curve_encoded': 1}
+    )
+    if not roast:
+        return jsonify({'error': 'Roast not found'}), 404
+
+    if request.args.get('format') == 'binary':
+        try:
+            payload = encode_temp_curve_payload(roast)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 422
+        return Response(payload, mimetype='application/octet-stream')
+
+    return jsonify(get_temp_curve_columns(roast))
 
 
 @app.route('/api/roast/update/<roast_id>', methods=['POST'])
@@ -402,6 +454,18 @@ def api_roast_delete_review(roast_id, review_id):
         return redirect(url_for('roast_detail', roast_id=roast_id))
 
 
+# ============================================
+# CLI Commands
+# ============================================
+
+@app.cli.command('train-roast-models')
+def train_roast_models_command():
+    """Fit first crack / drop prediction models from past roasts"""
+    from models.prediction_helpers import train_roast_models
+    count = train_roast_models(roasts_collection, roast_models_collection)
+    click.echo(f"Trained {count} roast model(s)")
+
+
 # ============================================
 # Template Filters
 # ============================================
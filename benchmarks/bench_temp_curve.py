@@ -0,0 +1,126 @@
+"""
+Compare the plain temp_curve layout against the compact columnar encoding
+
+For synthetic roasts of a few lengths, stored either way, reports:
+    - BSON size of the stored curve
+    - page read latency: BSON decode plus get_temp_curve, which is what the
+      roast pages do before rendering
+    - bytes of the rendered /roast/detail page
+    - bytes and latency of the /api/roast/curve JSON response
+    - bytes of the /api/roast/curve?format=binary response
+
+Responses are produced with the app's own templates and helpers; no running
+MongoDB is needed.
+
+Usage:
+    python benchmarks/bench_temp_curve.py
+"""
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import bson
+from flask import jsonify, render_template
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from models.curve_helpers import (  # noqa: E402
+    encode_temp_curve,
+    encode_temp_curve_payload,
+    get_temp_curve,
+    get_temp_curve_columns,
+)
+
+
+SAMPLE_COUNTS = [60, 300, 1200]
+REPEAT = 200
+
+
+def make_temp_curve(count):
+    """Synthetic curve: one sample every few seconds, slowly rising temperature"""
+    random.seed(count)
+    temp_curve = []
+    temperature = 25.0
+    fan, power = 9, 5
+    for i in range(count):
+        temperature += random.uniform(0.2, 1.0)
+        if i % 40 == 0:
+            fan = random.randint(4, 9)
+            power = random.randint(3, 9)
+        event = {
+            'time_seconds': i * 5,
+            'temperature': float(round(temperature)),
+            'fan_setting': fan,
+            'power_setting': power
+        }
+        if i % 50 == 0:
+            event['note'] = 'Adjusted settings'
+        temp_curve.append(event)
+    return temp_curve
+
+
+def make_roast(temp_curve, compact):
+    """Roast document as stored in either layout"""
+    start = datetime(2026, 1, 1, 10, 0)
+    roast = {
+        '_id': bson.ObjectId(),
+        'title': 'Benchmark Roast',
+        'roast_date': start,
+        'roaster': 'Freshroast SR800',
+        'temp_measurement_method': 'IR Gun',
+        'general_notes': '',
+        'key_timings': [{'event_name': 'First Crack Start', 'time_seconds': 400}],
+        'reviews': [],
+        'roast_start_time': start,
+        'roast_end_time': start + timedelta(seconds=temp_curve[-1]['time_seconds']),
+    }
+    if compact:
+        roast['temp_curve_encoded'] = encode_temp_curve(temp_curve)
+    else:
+        roast['temp_curve'] = temp_curve
+    return roast
+
+
+def render_detail_page(roast):
+    """Body of /roast/detail/<roast_id> for this roast"""
+    roast = dict(roast, bean_name='Not Set', temp_curve=get_temp_curve(roast))
+    roast['roast_duration_seconds'] = int((roast['roast_end_time'] - roast['roast_start_time']).total_seconds())
+    return render_template('roast_detail.html', roast=roast).encode('utf-8')
+
+
+def curve_json(roast):
+    """Body of /api/roast/curve/<roast_id>"""
+    return jsonify(get_temp_curve_columns(roast)).get_data()
+
+
+def time_per_call(func):
+    """Mean seconds per call"""
+    return timeit.timeit(func, number=REPEAT) / REPEAT
+
+
+def main():
+    header = (f"{'samples':>8} {'layout':>9} {'doc bytes':>10} {'page read us':>13} {'page bytes':>11} "
+              f"{'curve json bytes':>17} {'curve json us':>14} {'curve binary bytes':>19}")
+    print(header)
+    print('-' * len(header))
+
+    with app.test_request_context():
+        for count in SAMPLE_COUNTS:
+            temp_curve = make_temp_curve(count)
+            for layout, compact in (('plain', False), ('columnar', True)):
+                stored = bson.encode(make_roast(temp_curve, compact))
+                roast = bson.decode(stored)
+
+                page_read = time_per_call(lambda: get_temp_curve(bson.decode(stored)))
+                curve_read = time_per_call(lambda: curve_json(bson.decode(stored)))
+
+                print(f"{count:>8} {layout:>9} {len(stored):>10} {page_read * 1e6:>13.1f} "
+                      f"{len(render_detail_page(roast)):>11} {len(curve_json(roast)):>17} "
+                      f"{curve_read * 1e6:>14.1f} {len(encode_temp_curve_payload(roast)):>19}")
+
+
+if __name__ == '__main__':
+    main()
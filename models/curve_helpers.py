@@ -0,0 +1,240 @@
+import json
+import struct
+import numpy as np
+from bson.binary import Binary
+
+
+CURVE_ENCODING = 'delta-v1'
+
+# Column name -> (little-endian dtype of the stored deltas, fixed-point scale)
+# Temperatures are stored in tenths of a degree so they delta-encode as ints
+CURVE_COLUMNS = {
+    'time_seconds': ('<i4', 1),
+    'temperature': ('<i4', 10),
+    'fan_setting': ('<i1', 1),
+    'power_setting': ('<i1', 1),
+}
+
+# Largest scaled value accepted; keeps deltas well inside int64
+MAX_SCALED_VALUE = 2 ** 53
+
+
+def encode_temp_curve(temp_curve):
+    """
+    Encode a temp_curve list as delta-encoded columns stored as BSON binary
+
+    Temperatures are rounded to tenths of a degree (190.25 is stored as
+    190.2). Missing or None values are recorded in a sparse per-column
+    missing list so they decode back to None rather than 0.
+
+    Args:
+        temp_curve: List of temp_curve sample dictionaries
+
+    Returns:
+        Dictionary to store as the roast's temp_curve_encoded field
+
+    Raises:
+        ValueError: If a value is not finite or a delta does not fit the column's dtype
+    """
+    encoded = {
+        'encoding': CURVE_ENCODING,
+        'count': len(temp_curve),
+        # Notes and missing values are rare, so keep them sparse as indexes
+        'notes': [[i, event['note']] for i, event in enumerate(temp_curve) if event.get('note')],
+        'missing': {}
+    }
+
+    for column, (dtype, scale) in CURVE_COLUMNS.items():
+        raw = [event.get(column) for event in temp_curve]
+        missing = [i for i, value in enumerate(raw) if value is None]
+        if missing:
+            encoded['missing'][column] = missing
+
+        # Scale in float64 first so inf, nan and huge values can be rejected
+        # before they reach the int64 conversion
+        scaled = np.array([value if value is not None else 0 for value in raw], dtype=np.float64) * scale
+        if not np.isfinite(scaled).all() or (np.abs(scaled) > MAX_SCALED_VALUE).any():
+            raise ValueError(f"{column} value out of range for {CURVE_ENCODING}")
+        values = np.rint(scaled).astype(np.int64)
+        deltas = np.diff(values, prepend=0)
+
+        # Refuse to wrap around silently, e.g. a fan delta of 200 in int8
+        limits = np.iinfo(dtype)
+        if deltas.size and (deltas.min() < limits.min or deltas.max() > limits.max):
+            raise ValueError(f"{column} delta out of range for {dtype}")
+
+        encoded[column] = Binary(deltas.astype(dtype).tobytes())
+
+    return encoded
+
+
+def decode_temp_curve_columns(encoded):
+    """
+    Decode temp_curve_encoded back into one NumPy array per column
+
+    Missing values come back as 0; see decode_temp_curve_lists for None.
+
+    Args:
+        encoded: Dictionary produced by encode_temp_curve
+
+    Returns:
+        Dictionary of column name -> NumPy array
+
+    Raises:
+        ValueError: If the data was written with a different encoding
+    """
+    check_encoding(encoded)
+    columns = {}
+    for column, (dtype, scale) in CURVE_COLUMNS.items():
+        values = np.cumsum(np.frombuffer(encoded[column], dtype=dtype), dtype=np.int64)
+        columns[column] = values / scale if scale != 1 else values
+    return columns
+
+
+def check_encoding(encoded):
+    """Raise ValueError unless temp_curve_encoded uses CURVE_ENCODING"""
+    if encoded.get('encoding') != CURVE_ENCODING:
+        raise ValueError(f"Unsupported temp_curve encoding: {encoded.get('encoding')!r}")
+
+
+def decode_temp_curve_lists(encoded):
+    """
+    Decode temp_curve_encoded into one list per column, with None for missing values
+
+    Args:
+        encoded: Dictionary produced by encode_temp_curve
+
+    Returns:
+        Dictionary of column name -> list of values
+    """
+    columns = {column: values.tolist() for column, values in decode_temp_curve_columns(encoded).items()}
+    for column, indexes in (encoded.get('missing') or {}).items():
+        for i in indexes:
+            columns[column][i] = None
+    return columns
+
+
+def get_temp_curve(roast):
+    """
+    Return a roast's temperature curve as a list of sample dictionaries
+
+    Works for both the plain temp_curve array and the compact encoding. Any
+    samples pushed to temp_curve after compaction are appended at the end.
+
+    Args:
+        roast: Roast document
+
+    Returns:
+        List of temp_curve sample dictionaries
+    """
+    temp_curve = roast.get('temp_curve') or []
+    encoded = roast.get('temp_curve_encoded')
+    if not encoded:
+        return temp_curve
+
+    columns = decode_temp_curve_lists(encoded)
+    names = tuple(CURVE_COLUMNS)
+    decoded = [dict(zip(names, row)) for row in zip(*(columns[column] for column in names))]
+    for i, note in encoded.get('notes', []):
+        decoded[i]['note'] = note
+
+    return decoded + temp_curve
+
+
+def get_temp_curve_columns(roast):
+    """
+    Return a roast's temperature curve in columnar form for JSON responses
+
+    Args:
+        roast: Roast document
+
+    Returns:
+        Dictionary of column name -> list of values, plus sparse notes
+    """
+    encoded = roast.get('temp_curve_encoded')
+    temp_curve = roast.get('temp_curve') or []
+
+    if encoded:
+        columns = decode_temp_curve_lists(encoded)
+        notes = [list(pair) for pair in encoded.get('notes', [])]
+    else:
+        columns = {column: [] for column in CURVE_COLUMNS}
+        notes = []
+
+    offset = len(columns['time_seconds'])
+    for i, event in enumerate(temp_curve):
+        for column in CURVE_COLUMNS:
+            columns[column].append(event.get(column))
+        if event.get('note'):
+            notes.append([offset + i, event['note']])
+
+    columns['notes'] = notes
+    return columns
+
+
+def encode_temp_curve_payload(roast):
+    """
+    Pack a roast's temperature curve into a compact binary chart payload
+
+    The payload starts with a little-endian uint32 header length and a UTF-8
+    JSON header describing the layout (encoding, count, [name, dtype, scale]
+    per column and missing indexes), followed by the delta-encoded columns
+    concatenated in that order. Notes are not included.
+
+    Args:
+        roast: Roast document
+
+    Returns:
+        Payload bytes
+
+    Raises:
+        ValueError: If samples do not fit the encoding
+    """
+    encoded = roast.get('temp_curve_encoded')
+    if not encoded or roast.get('temp_curve'):
+        # Plain or partly plain curve, so encode it from scratch
+        encoded = encode_temp_curve(get_temp_curve(roast))
+    else:
+        check_encoding(encoded)
+
+    header = json.dumps({
+        'encoding': CURVE_ENCODING,
+        'count': encoded['count'],
+        'columns': [[column, dtype, scale] for column, (dtype, scale) in CURVE_COLUMNS.items()],
+        'missing': encoded.get('missing') or {}
+    }).encode('utf-8')
+    columns = b''.join(bytes(encoded[column]) for column in CURVE_COLUMNS)
+    return struct.pack('<I', len(header)) + header + columns
+
+
+def compact_temp_curve(roasts_collection, roast_id):
+    """
+    Replace a roast's temp_curve array with the compact columnar encoding
+
+    Curves with values that do not fit the encoding are left in the plain
+    layout so nothing is lost.
+
+    Args:
+        roasts_collection: MongoDB collection
+        roast_id: ObjectId of roast to compact
+    """
+    roast = roasts_collection.find_one(
+        {'_id': roast_id},
+        {'temp_curve': 1, 'temp_curve_encoded': 1}
+    )
+    if not roast or not roast.get('temp_curve'):
+        return
+
+    try:
+        encoded = encode_temp_curve(get_temp_curve(roast))
+    except ValueError:
+        return
+
+    # Only compact if no samples were pushed in the meantime
+    roasts_collection.update_one(
+        {'_id': roast_id, 'temp_curve': {'$size': len(roast['temp_curve'])}},
+        {
+            '$set': {'temp_curve_encoded': encoded},
+            '$unset': {'temp_curve': ''}
+        }
+    )
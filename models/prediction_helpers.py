@@ -0,0 +1,253 @@
+from bisect import bisect_right
+from datetime import datetime
+import numpy as np
+from models.curve_helpers import decode_temp_curve_columns
+
+
+FIRST_CRACK_EVENT = 'First Crack Start'
+
+# Temperature grid (°C) for the per-group time-to-first-crack profile
+PROFILE_TEMPERATURES = np.arange(0.0, 302.0, 2.0)
+
+
+def get_first_crack_timing(key_timings):
+    """Return the latest First Crack Start timing dict, or None"""
+    fc_timing = None
+    for timing in key_timings or []:
+        if FIRST_CRACK_EVENT in timing.get('event_name', ''):
+            fc_timing = timing  # Will keep updating to latest one
+    return fc_timing
+
+
+def _curve_arrays(roast):
+    """
+    Return a roast's (time_seconds, temperature) samples as float64 arrays
+
+    Compacted curves are decoded column-wise with NumPy; missing values and
+    any plain samples come back as NaN so callers can mask them out.
+    """
+    times = []
+    temperatures = []
+
+    encoded = roast.get('temp_curve_encoded')
+    if encoded:
+        columns = decode_temp_curve_columns(encoded)
+        time_column = columns['time_seconds'].astype(np.float64)
+        temperature_column = columns['temperature'].astype(np.float64)
+        missing = encoded.get('missing') or {}
+        time_column[missing.get('time_seconds', [])] = np.nan
+        temperature_column[missing.get('temperature', [])] = np.nan
+        times.append(time_column)
+        temperatures.append(temperature_column)
+
+    temp_curve = roast.get('temp_curve') or []
+    if temp_curve:
+        times.append(np.array([event.get('time_seconds') for event in temp_curve], dtype=np.float64))
+        temperatures.append(np.array([event.get('temperature') for event in temp_curve], dtype=np.float64))
+
+    if not times:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(times), np.concatenate(temperatures)
+
+
+def train_roast_models(roasts_collection, models_collection):
+    """
+    Fit per-bean, per-roaster prediction models from past roasts
+
+    Meant to run offline (see the `train-roast-models` CLI command). Each
+    finished roast with a logged First Crack Start contributes:
+        - the time and temperature at first crack
+        - the time remaining until first crack at each temperature of
+          PROFILE_TEMPERATURES, interpolated from its pre-first-crack curve
+        - the development time from first crack to the end of the roast
+    These are averaged per (bean_id, roaster) group and stored as one small
+    document per group in models_collection. Averaging a time-vs-temperature
+    profile rather than a single rate of rise keeps predictions unbiased for
+    curves that flatten out towards first crack.
+
+    Args:
+        roasts_collection: MongoDB roasts collection
+        models_collection: MongoDB collection holding fitted models
+
+    Returns:
+        Number of (bean, roaster) models written
+    """
+    models_collection.create_index([('bean_id', 1), ('roaster', 1)], unique=True)
+
+    roasts = roasts_collection.find(
+        {
+            'archived': {'$ne': True},
+            'bean_id': {'$exists': True},
+            'roast_start_time': {'$exists': True},
+            'roast_end_time': {'$exists': True},
+            'key_timings.0': {'$exists': True}
+        },
+        {'bean_id': 1, 'roaster': 1, 'key_timings': 1, 'temp_curve': 1, 'temp_curve_encoded': 1,
+         'roast_start_time': 1, 'roast_end_time': 1}
+    )
+
+    group_index = {}
+    group_keys = []
+    roast_group = []
+    fc_seconds = []
+    fc_temperature = []
+    development_seconds = []
+    profiles = []
+
+    for roast in roasts:
+        fc_timing = get_first_crack_timing(roast.get('key_timings'))
+        if not fc_timing or not roast.get('roast_start_time') or not roast.get('roast_end_time'):
+            continue
+
+        key = (roast['bean_id'], roast.get('roaster', ''))
+        if key not in group_index:
+            group_index[key] = len(group_keys)
+            group_keys.append(key)
+
+        fc = float(fc_timing['time_seconds'])
+        duration = (roast['roast_end_time'] - roast['roast_start_time']).total_seconds()
+
+        # Pre-first-crack samples in time order
+        times, temperatures = _curve_arrays(roast)
+        keep = ~np.isnan(times) & ~np.isnan(temperatures) & (times <= fc)
+        order = np.argsort(times[keep], kind='stable')
+        times, temperatures = times[keep][order], temperatures[keep][order]
+
+        fc_temp = fc_timing.get('temperature')
+        if fc_temp is None and times.size:
+            fc_temp = float(np.interp(fc, times, temperatures))
+        if fc_temp is not None:
+            times = np.append(times, fc)
+            temperatures = np.append(temperatures, fc_temp)
+
+        # Time left until first crack at each grid temperature. Readings can
+        # dip, so interpolate over the running maximum; above the first crack
+        # temperature nothing is left
+        profile = np.full(PROFILE_TEMPERATURES.size, np.nan)
+        if times.size >= 2:
+            rising = np.maximum.accumulate(temperatures)
+            if rising[-1] > rising[0]:
+                profile = fc - np.interp(PROFILE_TEMPERATURES, rising, times, left=np.nan, right=fc)
+
+        roast_group.append(group_index[key])
+        fc_seconds.append(fc)
+        fc_temperature.append(np.nan if fc_temp is None else fc_temp)
+        development_seconds.append(duration - fc)
+        profiles.append(profile)
+
+    if not group_keys:
+        return 0
+
+    n_groups = len(group_keys)
+    roast_group = np.asarray(roast_group, dtype=np.intp)
+    fc_seconds = np.asarray(fc_seconds, dtype=np.float64)
+    fc_temperature = np.asarray(fc_temperature, dtype=np.float64)
+    development_seconds = np.asarray(development_seconds, dtype=np.float64)
+    profiles = np.vstack(profiles)
+
+    # Average each per-roast quantity within its (bean, roaster) group
+    def group_mean(values):
+        valid = ~np.isnan(values)
+        counts = np.bincount(roast_group[valid], minlength=n_groups)
+        totals = np.bincount(roast_group[valid], weights=values[valid], minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    # Same for the profiles, one column per grid temperature
+    membership = np.zeros((n_groups, roast_group.size))
+    membership[roast_group, np.arange(roast_group.size)] = 1
+    profile_valid = ~np.isnan(profiles)
+    profile_counts = membership @ profile_valid
+    profile_totals = membership @ np.where(profile_valid, profiles, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profile_means = np.where(profile_counts > 0, profile_totals / profile_counts, np.nan)
+
+    roast_counts = np.bincount(roast_group, minlength=n_groups)
+    fc_seconds_mean = group_mean(fc_seconds)
+    fc_temperature_mean = group_mean(fc_temperature)
+    development_mean = group_mean(development_seconds)
+
+    def as_optional_float(value):
+        return None if np.isnan(value) else round(float(value), 4)
+
+    for g, (bean_id, roaster) in enumerate(group_keys):
+        # Keep the covered grid range, forced to be non-increasing, up to the
+        # first temperature where no time is left
+        covered = np.flatnonzero(~np.isnan(profile_means[g]))
+        profile_temperatures = []
+        profile_remaining = []
+        if covered.size:
+            span = slice(covered[0], covered[-1] + 1)
+            remaining = np.fmin.accumulate(profile_means[g][span])
+            done = np.flatnonzero(remaining <= 0)
+            end = done[0] + 1 if done.size else remaining.size
+            profile_temperatures = PROFILE_TEMPERATURES[span][:end].tolist()
+            profile_remaining = np.round(np.maximum(remaining[:end], 0), 2).tolist()
+
+        models_collection.update_one(
+            {'bean_id': bean_id, 'roaster': roaster},
+            {'$set': {
+                'fc_seconds': as_optional_float(fc_seconds_mean[g]),
+                'fc_temperature': as_optional_float(fc_temperature_mean[g]),
+                'profile_temperatures': profile_temperatures,
+                'profile_remaining_seconds': profile_remaining,
+                'development_seconds': as_optional_float(development_mean[g]),
+                'roast_count': int(roast_counts[g]),
+                'trained_at': datetime.now()
+            }},
+            upsert=True
+        )
+
+    return n_groups
+
+
+def _remaining_seconds(model, temperature):
+    """Interpolate the model's time-to-first-crack profile at a temperature"""
+    temperatures = model.get('profile_temperatures') or []
+    remaining = model.get('profile_remaining_seconds') or []
+    if not temperatures:
+        return None
+    if temperature <= temperatures[0]:
+        return remaining[0]
+    if temperature >= temperatures[-1]:
+        return remaining[-1]
+
+    i = bisect_right(temperatures, temperature)
+    t0, t1 = temperatures[i - 1], temperatures[i]
+    return remaining[i - 1] + (remaining[i] - remaining[i - 1]) * (temperature - t0) / (t1 - t0)
+
+
+def predict_timings(model, time_seconds, temperature=None, fc_seconds=None):
+    """
+    Predict first crack and drop times for a roast in progress
+
+    Plain-Python interpolation on the stored profile so it can run on every
+    add_event request without slowing down logging.
+
+    Args:
+        model: Model document from train_roast_models
+        time_seconds: Elapsed roast time of the current sample
+        temperature: Current temperature (optional)
+        fc_seconds: Logged First Crack Start time, if it already happened
+
+    Returns:
+        Dictionary with first_crack_seconds and drop_seconds (either may be None)
+    """
+    first_crack = fc_seconds
+    if first_crack is None:
+        first_crack = model.get('fc_seconds')
+        if temperature is not None:
+            remaining = _remaining_seconds(model, temperature)
+            if remaining is not None:
+                first_crack = time_seconds + remaining
+        if first_crack is not None:
+            first_crack = max(first_crack, time_seconds)
+
+    drop = None
+    if first_crack is not None and model.get('development_seconds') is not None:
+        drop = max(first_crack + model['development_seconds'], time_seconds)
+
+    return {
+        'first_crack_seconds': int(round(first_crack)) if first_crack is not None else None,
+        'drop_seconds': int(round(drop)) if drop is not None else None
+    }
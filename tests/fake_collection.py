@@ -0,0 +1,75 @@
+import copy
+
+
+_MISSING = object()
+
+
+def _lookup(doc, path):
+    """Resolve a dotted path like 'key_timings.0' the way MongoDB does"""
+    value = doc
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+
+def _matches(doc, query):
+    for path, condition in query.items():
+        value = _lookup(doc, path)
+        if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            for op, arg in condition.items():
+                if op == '$exists':
+                    if (value is not _MISSING) != arg:
+                        return False
+                elif op == '$ne':
+                    if value is not _MISSING and value == arg:
+                        return False
+                elif op == '$size':
+                    if not isinstance(value, list) or len(value) != arg:
+                        return False
+                else:
+                    raise NotImplementedError(f"FakeCollection does not support {op}")
+        elif value is _MISSING or value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a PyMongo collection the helpers use"""
+
+    def __init__(self, docs=None):
+        self.docs = [copy.deepcopy(doc) for doc in docs or []]
+        self.indexes = []
+
+    def _project(self, doc, projection):
+        if not projection:
+            return copy.deepcopy(doc)
+        projected = {key: copy.deepcopy(doc[key]) for key, include in projection.items() if include and key in doc}
+        if '_id' in doc and projection.get('_id', 1):
+            projected['_id'] = doc['_id']
+        return projected
+
+    def find(self, query=None, projection=None):
+        return [self._project(doc, projection) for doc in self.docs if _matches(doc, query or {})]
+
+    def find_one(self, query=None, projection=None):
+        found = self.find(query, projection)
+        return found[0] if found else None
+
+    def create_index(self, keys, unique=False):
+        self.indexes.append((list(keys), unique))
+
+    def update_one(self, query, update, upsert=False):
+        doc = next((doc for doc in self.docs if _matches(doc, query)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = {key: value for key, value in query.items() if not isinstance(value, dict)}
+            self.docs.append(doc)
+        doc.update(copy.deepcopy(update.get('$set', {})))
+        for key in update.get('$unset', {}):
+            doc.pop(key, None)
@@ -0,0 +1,130 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from models.curve_helpers import (
+    CURVE_COLUMNS,
+    compact_temp_curve,
+    encode_temp_curve,
+    encode_temp_curve_payload,
+    get_temp_curve,
+    get_temp_curve_columns,
+)
+from tests.fake_collection import FakeCollection
+
+
+def make_temp_curve():
+    return [
+        {'time_seconds': 0, 'temperature': 25.0, 'fan_setting': 9, 'power_setting': 5},
+        {'time_seconds': 30, 'temperature': 61.5, 'fan_setting': 9, 'power_setting': 7, 'note': 'More heat'},
+        {'time_seconds': 60, 'temperature': 98.0, 'fan_setting': 7, 'power_setting': 9},
+    ]
+
+
+def test_round_trip():
+    temp_curve = make_temp_curve()
+    encoded = encode_temp_curve(temp_curve)
+    assert get_temp_curve({'temp_curve_encoded': encoded}) == temp_curve
+
+
+def test_round_trip_with_trailing_plain_samples():
+    temp_curve = make_temp_curve()
+    extra = [{'time_seconds': 90, 'temperature': 120.0, 'fan_setting': 7, 'power_setting': 9}]
+    roast = {'temp_curve_encoded': encode_temp_curve(temp_curve), 'temp_curve': extra}
+    assert get_temp_curve(roast) == temp_curve + extra
+
+
+def test_missing_values_decode_as_none():
+    temp_curve = make_temp_curve()
+    temp_curve[1]['temperature'] = None
+    del temp_curve[2]['fan_setting']
+
+    roast = {'temp_curve_encoded': encode_temp_curve(temp_curve)}
+    decoded = get_temp_curve(roast)
+    assert decoded[1]['temperature'] is None
+    assert decoded[2]['fan_setting'] is None
+    assert decoded[2]['power_setting'] == 9
+
+    columns = get_temp_curve_columns(roast)
+    assert columns['temperature'] == [25.0, None, 98.0]
+    assert columns['fan_setting'] == [9, 9, None]
+
+
+def test_temperature_rounded_to_tenths():
+    temp_curve = [{'time_seconds': 0, 'temperature': 190.25, 'fan_setting': 5, 'power_setting': 5}]
+    decoded = get_temp_curve({'temp_curve_encoded': encode_temp_curve(temp_curve)})
+    assert decoded[0]['temperature'] == 190.2
+
+
+def test_overflowing_delta_is_rejected():
+    temp_curve = make_temp_curve()
+    temp_curve[2]['fan_setting'] = 200  # Delta of 191 does not fit int8
+    with pytest.raises(ValueError):
+        encode_temp_curve(temp_curve)
+
+    # Compaction leaves the plain layout untouched instead of wrapping to -56
+    roasts = FakeCollection([{'_id': 1, 'temp_curve': temp_curve}])
+    compact_temp_curve(roasts, 1)
+    roast = roasts.find_one({'_id': 1})
+    assert 'temp_curve_encoded' not in roast
+    assert roast['temp_curve'][2]['fan_setting'] == 200
+
+
+def test_compact_replaces_plain_layout():
+    temp_curve = make_temp_curve()
+    roasts = FakeCollection([{'_id': 1, 'temp_curve': list(temp_curve)}])
+    compact_temp_curve(roasts, 1)
+    roast = roasts.find_one({'_id': 1})
+    assert 'temp_curve' not in roast
+    assert get_temp_curve(roast) == temp_curve
+
+
+def test_binary_payload_describes_itself():
+    temp_curve = make_temp_curve()
+    temp_curve[0]['temperature'] = None
+    payload = encode_temp_curve_payload({'temp_curve_encoded': encode_temp_curve(temp_curve)})
+
+    (header_length,) = struct.unpack_from('<I', payload)
+    header = json.loads(payload[4:4 + header_length])
+    assert header['count'] == 3
+    assert [column[0] for column in header['columns']] == list(CURVE_COLUMNS)
+    assert header['missing'] == {'temperature': [0]}
+
+    # Decode using only what the header says
+    offset = 4 + header_length
+    columns = {}
+    for name, dtype, scale in header['columns']:
+        deltas = np.frombuffer(payload, dtype=dtype, count=header['count'], offset=offset)
+        columns[name] = np.cumsum(deltas) / scale
+        offset += deltas.nbytes
+    assert offset == len(payload)
+    assert columns['time_seconds'].tolist() == [0, 30, 60]
+    assert columns['temperature'][1:].tolist() == [61.5, 98.0]
+
+    # Plain and stored layouts produce the same payload
+    assert encode_temp_curve_payload({'temp_curve': temp_curve}) == payload
+
+
+@pytest.mark.parametrize('temperature', [1e18, float('inf'), float('nan')])
+def test_non_finite_or_huge_value_is_rejected(temperature):
+    temp_curve = make_temp_curve()
+    temp_curve[1]['temperature'] = temperature
+    with pytest.raises(ValueError):
+        encode_temp_curve(temp_curve)
+
+    roasts = FakeCollection([{'_id': 1, 'temp_curve': temp_curve}])
+    compact_temp_curve(roasts, 1)
+    assert 'temp_curve_encoded' not in roasts.find_one({'_id': 1})
+    with pytest.raises(ValueError):
+        encode_temp_curve_payload({'temp_curve': temp_curve})
+
+
+def test_unknown_encoding_is_rejected():
+    encoded = encode_temp_curve(make_temp_curve())
+    encoded['encoding'] = 'delta-v2'
+    with pytest.raises(ValueError, match='delta-v2'):
+        get_temp_curve({'temp_curve_encoded': encoded})
+    with pytest.raises(ValueError, match='delta-v2'):
+        encode_temp_curve_payload({'temp_curve_encoded': encoded})
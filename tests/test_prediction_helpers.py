@@ -0,0 +1,103 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.curve_helpers import encode_temp_curve
+from models.prediction_helpers import get_first_crack_timing, predict_timings, train_roast_models
+from tests.fake_collection import FakeCollection
+
+
+START = datetime(2026, 1, 1, 10, 0)
+
+
+def make_roast(bean_id, curve, fc_seconds, fc_temperature=None, end_seconds=None, step=30):
+    fc_timing = {'event_name': 'First Crack Start', 'time_seconds': fc_seconds}
+    if fc_temperature is not None:
+        fc_timing['temperature'] = fc_temperature
+    roast = {
+        'bean_id': bean_id,
+        'roaster': 'Freshroast SR800',
+        'key_timings': [{'event_name': 'Yellowing', 'time_seconds': 200}, fc_timing],
+        'temp_curve': [
+            {'time_seconds': t, 'temperature': curve(t), 'fan_setting': 9, 'power_setting': 5}
+            for t in range(0, fc_seconds + 1, step)
+        ],
+        'roast_start_time': START
+    }
+    if end_seconds is not None:
+        roast['roast_end_time'] = START + timedelta(seconds=end_seconds)
+    return roast
+
+
+def test_get_first_crack_timing_uses_latest():
+    key_timings = [
+        {'event_name': 'First Crack Start', 'time_seconds': 380},
+        {'event_name': 'First Crack Start', 'time_seconds': 400},
+        {'event_name': 'First Crack End', 'time_seconds': 450},
+    ]
+    assert get_first_crack_timing(key_timings)['time_seconds'] == 400
+    assert get_first_crack_timing([]) is None
+
+
+def test_train_and_predict_two_roasts():
+    roast_a = make_roast('bean-1', lambda t: 20 + 0.5 * t, 390, fc_temperature=215.0, end_seconds=510)
+    # Samples after first crack and samples without a temperature are ignored
+    roast_a['temp_curve'].append({'time_seconds': 450, 'temperature': 100.0, 'fan_setting': 9, 'power_setting': 5})
+    roast_a['temp_curve'].append({'time_seconds': 10, 'temperature': None, 'fan_setting': 9, 'power_setting': 5})
+    # No FC temperature logged: taken from the curve, 20 + 0.4 * 420 = 188
+    roast_b = make_roast('bean-1', lambda t: 20 + 0.4 * t, 420, end_seconds=560)
+    roast_b['temp_curve_encoded'] = encode_temp_curve(roast_b.pop('temp_curve'))
+
+    # None of these may influence the model
+    unfinished = make_roast('bean-1', lambda t: 20 + 2.0 * t, 60)
+    archived = make_roast('bean-1', lambda t: 20 + 2.0 * t, 60, end_seconds=100)
+    archived['archived'] = True
+    no_fc = make_roast('bean-2', lambda t: 20 + 0.5 * t, 390, end_seconds=510)
+    no_fc['key_timings'] = [{'event_name': 'Yellowing', 'time_seconds': 200}]
+
+    models = FakeCollection()
+    roasts = FakeCollection([roast_a, roast_b, unfinished, archived, no_fc])
+    assert train_roast_models(roasts, models) == 1
+    assert models.indexes == [([('bean_id', 1), ('roaster', 1)], True)]
+
+    model = models.find_one({'bean_id': 'bean-1', 'roaster': 'Freshroast SR800'})
+    assert model['roast_count'] == 2
+    assert model['fc_seconds'] == pytest.approx(405)
+    assert model['fc_temperature'] == pytest.approx(201.5)
+    assert model['development_seconds'] == pytest.approx(130)
+
+    # At 60°C roast A has 390 - 80 = 310s left and roast B 420 - 100 = 320s
+    assert predict_timings(model, 100, 60.0) == {'first_crack_seconds': 415, 'drop_seconds': 545}
+    # Without a temperature fall back to the mean first crack time
+    assert predict_timings(model, 100) == {'first_crack_seconds': 405, 'drop_seconds': 535}
+    # Once first crack is logged only the drop is predicted from it
+    assert predict_timings(model, 430, 210.0, fc_seconds=415) == {'first_crack_seconds': 415, 'drop_seconds': 545}
+
+
+def test_curved_profile_is_not_biased():
+    # Rate of rise falls off towards first crack, like a real roast
+    def curve(t):
+        return 20 + 200 * (1 - math.exp(-t / 300))
+
+    roasts = FakeCollection([
+        make_roast('bean-1', curve, 480, fc_temperature=curve(480), end_seconds=570)
+        for _ in range(3)
+    ])
+    models = FakeCollection()
+    train_roast_models(roasts, models)
+    model = models.find_one({'bean_id': 'bean-1'})
+
+    # Replaying the training curve should predict its own first crack
+    for t in (60, 120, 240, 360, 450):
+        prediction = predict_timings(model, t, curve(t))
+        assert prediction['first_crack_seconds'] == pytest.approx(480, abs=3)
+        assert prediction['drop_seconds'] == pytest.approx(570, abs=3)
+
+
+def test_predict_without_profile():
+    model = {'fc_seconds': 300.0, 'profile_temperatures': [], 'profile_remaining_seconds': [],
+             'development_seconds': None}
+    assert predict_timings(model, 120, 150.0) == {'first_crack_seconds': 300, 'drop_seconds': None}
+    # Never predicts a time in the past
+    assert predict_timings(model, 350, 200.0) == {'first_crack_seconds': 350, 'drop_seconds': None}